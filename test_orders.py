@@ -0,0 +1,202 @@
+import json
+import time
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import test_chunker
+from test_chunker import Address, Order, OrderManager, OrderStatus, Product
+
+
+def _address() -> Address:
+    return Address("123 Main St", "Springfield", "IL", "62701")
+
+
+class OrderTotalsTest(unittest.TestCase):
+    def test_removing_every_item_leaves_zero_total(self):
+        order = Order("A", "CUST1", _address())
+        order.add_item(Product("P1", "Widget", 0.1, 10), 1)
+        order.add_item(Product("P2", "Gadget", 0.2, 10), 1)
+        
+        order.remove_item("P1")
+        order.remove_item("P2")
+        
+        self.assertEqual(order.total_amount, 0.0)
+        self.assertTrue(order.process_payment("card", 0.0))
+
+
+class OrderStatusIndexTest(unittest.TestCase):
+    def test_assigning_status_moves_order_between_buckets(self):
+        manager = OrderManager()
+        order = manager.create_order("A", "CUST1", _address())
+        
+        order.status = OrderStatus.CANCELLED
+        
+        self.assertEqual(manager.get_orders_by_status(OrderStatus.CANCELLED), [order])
+        self.assertEqual(manager.get_orders_by_status(OrderStatus.PENDING), [])
+    
+    def test_buckets_follow_order_of_entering_status(self):
+        manager = OrderManager()
+        a = manager.create_order("A", "CUST1", _address())
+        b = manager.create_order("B", "CUST1", _address())
+        
+        b.process_payment("card", 0.0)
+        a.process_payment("card", 0.0)
+        
+        self.assertEqual(manager.get_orders_by_status(OrderStatus.PROCESSING), [b, a])
+
+
+class BulkLoadTest(unittest.TestCase):
+    def test_loaded_orders_get_wall_clock_back_when_a_row_fails(self):
+        manager = OrderManager()
+        manager.create_order("X", "CUST1", _address())
+        
+        with self.assertRaises(OrderManager.DuplicateOrderError):
+            manager.bulk_load([("Y", "CUST2", _address()), ("X", "CUST2", _address())])
+        
+        loaded = manager.get_order("Y")
+        time.sleep(0.001)
+        loaded.add_item(Product("P1", "Widget", 1.0, 10), 1)
+        self.assertGreater(loaded.updated_at, loaded.created_at)
+
+
+class OrderBatchTest(unittest.TestCase):
+    def test_payment_inside_batch_checks_current_total(self):
+        order = Order("A", "CUST1", _address())
+        
+        with order.batch():
+            order.add_item(Product("P1", "Widget", 100.0, 10), 1)
+            with self.assertRaises(ValueError):
+                order.process_payment("card", 0.0)
+            self.assertIs(order.status, OrderStatus.PENDING)
+            self.assertTrue(order.process_payment("card", 108.0))
+        
+        self.assertAlmostEqual(order.total_amount, 108.0)
+    
+    def test_discount_inside_batch_uses_current_total(self):
+        order = Order("A", "CUST1", _address())
+        
+        with order.batch():
+            order.add_item(Product("P1", "Widget", 100.0, 10), 1)
+            discount = order.apply_discount("SAVE10")
+        
+        self.assertAlmostEqual(discount, 10.8)
+        self.assertAlmostEqual(order.total_amount, 97.2)
+
+
+class OrderStockTest(unittest.TestCase):
+    def test_lines_for_same_product_count_against_stock_together(self):
+        order = Order("A", "CUST1", _address())
+        product = Product("P1", "Widget", 1.0, 3)
+        order.add_item(product, 2)
+        
+        with self.assertRaises(ValueError):
+            order.add_item(product, 2)
+        self.assertEqual(len(order.items), 1)
+    
+    def test_successful_payment_deducts_stock_once(self):
+        order = Order("A", "CUST1", _address())
+        product = Product("P1", "Widget", 1.0, 5)
+        order.add_item(product, 1)
+        order.add_item(product, 2)
+        self.assertEqual(product.stock, 5)
+        
+        self.assertTrue(order.process_payment("card", 100.0))
+        
+        self.assertEqual(product.stock, 2)
+        order.ship_order("TRACK1")
+        self.assertEqual(product.stock, 2)
+    
+    def test_payment_fails_when_stock_was_taken_by_another_order(self):
+        product = Product("P1", "Widget", 1.0, 1)
+        first = Order("A", "CUST1", _address())
+        second = Order("B", "CUST2", _address())
+        first.add_item(product, 1)
+        second.add_item(product, 1)
+        
+        first.process_payment("card", 100.0)
+        with self.assertRaises(ValueError):
+            second.process_payment("card", 100.0)
+        
+        self.assertIs(second.status, OrderStatus.PENDING)
+        self.assertEqual(product.stock, 0)
+    
+    def test_declined_charge_leaves_stock_reserved_but_undeducted(self):
+        order = Order("A", "CUST1", _address())
+        product = Product("P1", "Widget", 1.0, 5)
+        order.add_item(product, 2)
+        
+        declined = {"success": False, "error": "card declined"}
+        with mock.patch.object(Order, "_charge_payment", return_value=declined):
+            self.assertFalse(order.process_payment("card", 100.0))
+        
+        self.assertEqual(product.stock, 5)
+        self.assertEqual(order._stock_delta, {"P1": (product, 2)})
+        self.assertIs(order.status, OrderStatus.PENDING)
+    
+    def test_remove_item_releases_reservation(self):
+        order = Order("A", "CUST1", _address())
+        product = Product("P1", "Widget", 1.0, 3)
+        order.add_item(product, 3)
+        
+        order.remove_item("P1")
+        order.add_item(product, 3)
+        order.remove_item("P1")
+        order.process_payment("card", 0.0)
+        
+        self.assertEqual(product.stock, 3)
+
+
+class OrderClockTest(unittest.TestCase):
+    def test_default_clock_follows_patched_datetime(self):
+        frozen = datetime(2024, 1, 2, 3, 4, 5)
+        
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return frozen
+        
+        with mock.patch.object(test_chunker, "datetime", FrozenDatetime):
+            order = OrderManager().create_order("A", "CUST1", _address())
+            order.add_item(Product("P1", "Widget", 1.0, 10), 1)
+        
+        self.assertEqual(order.created_at, frozen)
+        self.assertEqual(order.updated_at, frozen)
+
+
+class OrderDayTest(unittest.TestCase):
+    def test_parses_date_part_of_common_forms(self):
+        for value in ("2024-03-05", "2024-03-05T23:59:59+05:00",
+                      "2024-03-05 10:00", "20240305T120000"):
+            self.assertEqual(test_chunker._order_day(value), date(2024, 3, 5), value)
+    
+    def test_rejects_trailing_garbage_after_date(self):
+        with self.assertRaises(ValueError):
+            test_chunker._order_day("2024-01-01garbage")
+
+
+class OrderToJsonTest(unittest.TestCase):
+    def test_stdlib_fallback_is_equivalent_json(self):
+        order = Order("A", "CUST1", _address())
+        order.add_item(Product("P1", "Café", 1e-05, 10), 1)
+        order.add_item(Product("P2", "Gadget", 1e16, 10), 1)
+        
+        with mock.patch.object(test_chunker, "orjson", None):
+            fallback = order.to_json()
+        
+        self.assertIn("Café".encode(), fallback)
+        expected = order.to_dict()
+        self.assertEqual(json.loads(fallback), expected)
+        if test_chunker.orjson is not None:
+            self.assertEqual(json.loads(order.to_json()), expected)
+    
+    def test_stdlib_fallback_rejects_non_finite_numbers(self):
+        order = Order("A", "CUST1", _address())
+        order.add_item(Product("P1", "Widget", float("nan"), 10), 1)
+        
+        with mock.patch.object(test_chunker, "orjson", None):
+            with self.assertRaises(ValueError):
+                order.to_json()
+
+if __name__ == "__main__":
+    unittest.main()